@@ -0,0 +1,194 @@
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+
+from scoring import (add_text_similarity_arguments, combine_partial, comparison_settings, empty_partial,
+                     finalize, load_manifest, print_summary, score_pair, settings_from_args)
+
+
+def settings_hash(settings=None):
+    settings = comparison_settings() if settings is None else settings
+    return hashlib.sha256(json.dumps(settings, sort_keys=True).encode()).hexdigest()
+
+
+def file_hash(filename):
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _stat_key(filename):
+    st = os.stat(filename)
+    return [st.st_mtime_ns, st.st_size]
+
+
+def pair_key(entry):
+    return f"{entry['ground_truth']}\0{entry['prediction']}"
+
+
+def new_state(settings=None):
+    settings = comparison_settings() if settings is None else settings
+    return {"settings": settings, "settings_hash": settings_hash(settings), "pairs": {},
+            "aggregate": empty_partial(settings["n_boot"])}
+
+
+def load_state(filename, settings=None):
+    # A state whose comparison settings differ from the current ones is discarded
+    settings = comparison_settings() if settings is None else settings
+    if os.path.exists(filename):
+        with open(filename, 'r') as file:
+            state = json.load(file)
+        if state.get("settings_hash") == settings_hash(settings):
+            return state
+    return new_state(settings)
+
+
+def save_state(state, filename):
+    # Write to a temporary file first so a dashboard never reads a half-written state
+    tmp = f"{filename}.tmp"
+    with open(tmp, 'w') as file:
+        json.dump(state, file)
+    os.replace(tmp, filename)
+
+
+def update_state(state, entries, prune=True):
+    # Re-score only pairs whose files changed and patch the stored aggregate in place.
+    # File contents are hashed only when size or mtime moved, so unchanged pairs cost one stat() each.
+    # Returns the number of pairs that were (re-)scored or removed.
+    changed = 0
+    seen = set()
+    for entry in entries:
+        key = pair_key(entry)
+        try:
+            stats = [_stat_key(entry["ground_truth"]), _stat_key(entry["prediction"])]
+        except FileNotFoundError:
+            # Deleted files are not "seen", so their old result is pruned from the aggregate
+            continue
+        seen.add(key)
+        stored = state["pairs"].get(key)
+        if stored and stored["stat"] == stats:
+            continue
+        content = hashlib.sha256(
+            f"{file_hash(entry['ground_truth'])}{file_hash(entry['prediction'])}".encode()).hexdigest()
+        if stored and stored["hash"] == content:
+            stored["stat"] = stats
+            continue
+        try:
+            partial = score_pair(entry, settings=state["settings"])
+        except (ValueError, OSError):
+            # Prediction file still being written; pick it up on the next pass
+            continue
+        if stored:
+            combine_partial(state["aggregate"], stored["partial"], sign=-1)
+        combine_partial(state["aggregate"], partial)
+        state["pairs"][key] = {"hash": content, "stat": stats, "partial": partial}
+        changed += 1
+
+    if prune:
+        for key in [k for k in state["pairs"] if k not in seen]:
+            combine_partial(state["aggregate"], state["pairs"].pop(key)["partial"], sign=-1)
+            changed += 1
+    return changed
+
+
+def entries_from_dirs(gt_dir, pred_dir):
+    # Pair prediction files with ground truth files of the same name
+    entries = []
+    for name in sorted(os.listdir(pred_dir)):
+        gt = os.path.join(gt_dir, name)
+        if name.endswith('.json') and os.path.exists(gt):
+            entries.append({"ground_truth": gt, "prediction": os.path.join(pred_dir, name)})
+    return entries
+
+
+def _change_event(paths):
+    # Wake the watch loop on filesystem notifications when watchdog is installed;
+    # without it the loop just polls
+    event = threading.Event()
+    try:
+        from watchdog.events import FileSystemEventHandler
+        from watchdog.observers import Observer
+    except ImportError:
+        return event, None
+
+    class Handler(FileSystemEventHandler):
+        def on_any_event(self, _):
+            event.set()
+
+    observer = Observer()
+    for path in paths:
+        observer.schedule(Handler(), path, recursive=False)
+    observer.start()
+    return event, observer
+
+
+def watch(list_entries, state_file, watch_paths, interval=5.0, callback=None, settings=None):
+    # Keep the state file up to date while an extraction job writes new prediction files
+    state = load_state(state_file, settings)
+    event, observer = _change_event(watch_paths)
+    try:
+        while True:
+            try:
+                entries = list_entries()
+            except (ValueError, OSError):
+                # Manifest caught mid-write; try again on the next pass
+                entries = None
+            if entries is not None and update_state(state, entries):
+                save_state(state, state_file)
+                if callback:
+                    callback(state)
+            event.wait(interval)
+            event.clear()
+    finally:
+        if observer is not None:
+            observer.stop()
+            observer.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incrementally score a manifest, optionally watching for new predictions")
+    parser.add_argument('--manifest', help="manifest file (re-read on every pass in watch mode)")
+    parser.add_argument('--gt-dir', help="ground truth directory, paired by file name with --pred-dir")
+    parser.add_argument('--pred-dir')
+    parser.add_argument('--state', default='eval_state.json')
+    parser.add_argument('--watch', action='store_true')
+    parser.add_argument('--interval', type=float, default=5.0, help="polling interval in seconds")
+    add_text_similarity_arguments(parser)
+    args = parser.parse_args()
+    settings = settings_from_args(args)
+
+    if args.manifest:
+        def list_entries():
+            return load_manifest(args.manifest)
+        watch_paths = [os.path.dirname(os.path.abspath(args.manifest))]
+    elif args.gt_dir and args.pred_dir:
+        def list_entries():
+            return entries_from_dirs(args.gt_dir, args.pred_dir)
+        watch_paths = [args.pred_dir]
+    else:
+        parser.error("give either --manifest or both --gt-dir and --pred-dir")
+
+    if args.watch:
+        def report(state):
+            result = finalize(state["aggregate"])
+            print(f"{time.strftime('%H:%M:%S')}  {result['n_pairs']} pairs  {result['perc_true']:.2f}%", flush=True)
+        try:
+            watch(list_entries, args.state, watch_paths, args.interval, report, settings)
+        except KeyboardInterrupt:
+            pass
+        return
+
+    state = load_state(args.state, settings)
+    changed = update_state(state, list_entries())
+    save_state(state, args.state)
+    print(f"{changed} pair(s) re-scored")
+    print_summary(finalize(state["aggregate"]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,186 @@
+import argparse
+import html
+import json
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+SKIP_KEYS = {'input_text', 'reaction_id'}
+# Keys holding ORD enum values (NAME, GRAM, SOLVENT, ...), which never appear verbatim in a procedure.
+# Chosen by key rather than by value shape so all-caps names like DMF or THF are still grounded.
+ENUM_KEYS = {'type', 'units', 'reactionRole', 'reaction_role', 'precision'}
+NUMBER_RE = re.compile(r'-?\d+(\.\d+)?')
+
+
+def iter_leaves(obj, prefix=""):
+    # Yield (path, value) for every leaf, using the same "key: [idx]: " paths as the table view
+    if isinstance(obj, dict):
+        for key, val in obj.items():
+            if key in SKIP_KEYS or (key in ENUM_KEYS and not isinstance(val, (dict, list))):
+                continue
+            yield from iter_leaves(val, prefix + str(key) + ": ")
+    elif isinstance(obj, list):
+        for idx, val in enumerate(obj):
+            yield from iter_leaves(val, prefix + f"[{idx}]: ")
+    else:
+        yield prefix, obj
+
+
+def surface_form(value):
+    # The lowercase string we expect to find in the procedure, or None if the leaf is not groundable
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float):
+        # Plain decimal notation: 10.0 -> "10", 2.8 -> "2.8", 1234567.0 -> "1234567", never "1.2e+06"
+        if value.is_integer():
+            return str(int(value))
+        form = repr(value)
+        return form if 'e' not in form else f"{value:.12f}".rstrip('0')
+    value = str(value).strip()
+    if not value:
+        return None
+    return value.lower()
+
+
+class Automaton:
+    # Aho-Corasick automaton: one pass over the text finds every occurrence of every pattern
+
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [[]]
+        for pid, pattern in enumerate(self.patterns):
+            state = 0
+            for ch in pattern:
+                nxt = self.goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[state][ch] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append([])
+                state = nxt
+            self.out[state].append(pid)
+
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0)
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+
+    def finditer(self, text):
+        # Yield (pattern_id, start, end) for every match
+        goto, fail, out, patterns = self.goto, self.fail, self.out, self.patterns
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for pid in out[state]:
+                yield pid, i + 1 - len(patterns[pid]), i + 1
+
+
+def _boundary_ok(text, start, end, pattern):
+    # Words must not be part of a longer word ("ethanol" inside "methanol");
+    # numbers must not be part of a longer number ("10" inside "100"), but "2.8" may match "2.80"
+    if not NUMBER_RE.fullmatch(pattern):
+        if pattern[0].isalnum() and start > 0 and text[start - 1].isalnum():
+            return False
+        if pattern[-1].isalnum() and end < len(text) and text[end].isalnum():
+            return False
+        return True
+    if start > 0 and (text[start - 1].isdigit() or text[start - 1] == '.'):
+        return False
+    if '.' not in pattern and end + 1 < len(text) and text[end] == '.' and text[end + 1].isdigit():
+        end += 1
+        while end < len(text) and text[end] == '0':
+            end += 1
+        return end >= len(text) or not text[end].isdigit()
+    while '.' in pattern and end < len(text) and text[end] == '0':
+        end += 1
+    return end >= len(text) or not text[end].isdigit()
+
+
+def ground_record(record, text=None):
+    # Check every extracted leaf of one record against its procedure text.
+    # Returns a list of {"Path", "Value", "Found", "Spans"} rows; ungroundable leaves are left out.
+    if text is None:
+        text = record.get('input_text', '') if isinstance(record, dict) else ''
+    leaves = []
+    patterns = {}
+    for path, value in iter_leaves(record):
+        form = surface_form(value)
+        if form is None:
+            continue
+        leaves.append((path, value, form))
+        patterns.setdefault(form, len(patterns))
+
+    automaton = Automaton(patterns)
+    lowered = text.lower()
+    spans = {}
+    for pid, start, end in automaton.finditer(lowered):
+        pattern = automaton.patterns[pid]
+        if _boundary_ok(lowered, start, end, pattern):
+            spans.setdefault(pattern, []).append((start, end))
+
+    return [{"Path": path, "Value": value, "Found": form in spans, "Spans": spans.get(form, [])}
+            for path, value, form in leaves]
+
+
+def ground_records(records, workers=None, chunksize=256):
+    # Batch grounding; with workers the records are spread over a process pool
+    if not workers or workers <= 1:
+        return [ground_record(r) for r in records]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(ground_record, records, chunksize=chunksize))
+
+
+def highlight_html(text, grounding, color='#A9F5BC'):
+    # Wrap every grounded span in a <mark>; overlapping spans are merged
+    spans = sorted(span for row in grounding for span in row["Spans"])
+    merged = []
+    for start, end in spans:
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    parts = []
+    pos = 0
+    for start, end in merged:
+        parts.append(html.escape(text[pos:start]))
+        parts.append(f'<mark style="background-color:{color};">{html.escape(text[start:end])}</mark>')
+        pos = end
+    parts.append(html.escape(text[pos:]))
+    return ''.join(parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check extracted values against the procedure text")
+    parser.add_argument('files', nargs='+', help="JSON files holding lists of extracted records")
+    parser.add_argument('--workers', type=int, default=1)
+    args = parser.parse_args()
+
+    for filename in args.files:
+        with open(filename, 'r') as file:
+            records = json.load(file)
+        if isinstance(records, dict):
+            records = [records]
+        results = ground_records(records, workers=args.workers)
+        for record, grounding in zip(records, results):
+            missing = [row["Path"] for row in grounding if not row["Found"]]
+            print(f"{filename}\t{record.get('reaction_id', '-')}\t"
+                  f"{len(grounding) - len(missing)}/{len(grounding)} grounded")
+            for path in missing:
+                print(f"    not in source: {path}")
+
+
+if __name__ == '__main__':
+    main()
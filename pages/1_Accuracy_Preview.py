@@ -0,0 +1,46 @@
+import os
+
+import pandas as pd
+import streamlit as st
+
+from scoring import load_manifest
+from preview import run_preview
+
+
+# Manifests are immutable once written; load each one once per server process
+@st.cache_resource(max_entries=8)
+def cached_manifest(filename, mtime):
+    return load_manifest(filename)
+
+st.set_page_config(layout="wide")
+st.title('Accuracy Preview')
+st.markdown('Scores a stratified random sample of the manifest and stops once the 95% interval is narrow enough.')
+
+manifest_path = st.text_input('Manifest file:', 'manifest.json')
+col1, col2, col3, col4 = st.columns(4)
+with col1:
+    target_width = st.number_input('Stop at CI width (points):', min_value=0.1, value=2.0, step=0.5)
+with col2:
+    min_pairs = st.number_input('Minimum pairs:', min_value=1, value=30)
+with col3:
+    sample_size = st.number_input('Maximum sample size (0 = whole manifest):', min_value=0, value=0)
+with col4:
+    workers = st.number_input('Worker processes:', min_value=1, value=1)
+
+if st.button('Run preview'):
+    entries = cached_manifest(manifest_path, os.path.getmtime(manifest_path))
+    status = st.empty()
+    progress = st.progress(0.0)
+    table = st.empty()
+    snap = None
+    for snap in run_preview(entries, sample_size or None, target_width, min_pairs, workers):
+        lo, hi = snap["ci"]
+        status.markdown(f"## Percent accuracy: {snap['perc_true']:.2f}% "
+                        f"(95% CI {lo:.2f}–{hi:.2f}, {snap['n_sampled']} of {snap['population']} pairs)")
+        progress.progress(min(1.0, target_width / snap["width"]) if snap["width"] else 1.0)
+        # Redrawing the table on every pair is slow for big runs, so only refresh every few pairs
+        if snap["n_sampled"] % 10 == 0 or snap["n_sampled"] < 10:
+            table.dataframe(pd.DataFrame.from_dict(snap["fields"], orient='index'), use_container_width=True)
+    if snap:
+        table.dataframe(pd.DataFrame.from_dict(snap["fields"], orient='index'), use_container_width=True)
+        st.success(f"Stopped after {snap['n_sampled']} pairs, CI width {snap['width']:.2f} points.")
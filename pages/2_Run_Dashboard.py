@@ -0,0 +1,35 @@
+import json
+import os
+import time
+
+import streamlit as st
+import pandas as pd
+
+from scoring import finalize
+
+st.set_page_config(layout="wide")
+st.title('Run Dashboard')
+st.markdown('Shows the stored evaluation state kept up to date by `python eval_state.py --watch`.')
+
+state_file = st.text_input('State file:', 'eval_state.json')
+auto_refresh = st.checkbox('Refresh automatically', value=True)
+interval = st.number_input('Refresh every (seconds):', min_value=1, value=5)
+
+if not os.path.exists(state_file):
+    st.info('No state file yet. Start the watcher to create it.')
+else:
+    # Read the file as written: load_state() would discard a state scored with non-default settings
+    with open(state_file, 'r') as file:
+        state = json.load(file)
+    result = finalize(state["aggregate"])
+    lo, hi = result["ci"]
+    st.markdown(f"## Percent accuracy: {result['perc_true']:.2f}% (95% CI {lo:.2f}–{hi:.2f})")
+    st.caption(f"{result['n_pairs']} pairs, {result['n_records']} records, {result['n_leaves']} leaves, "
+               f"updated {time.ctime(os.path.getmtime(state_file))}")
+    st.dataframe(pd.DataFrame.from_dict(result["fields"], orient='index'), use_container_width=True)
+    with st.expander('Comparison settings'):
+        st.json(state.get("settings", {}))
+
+if auto_refresh:
+    time.sleep(interval)
+    st.rerun()
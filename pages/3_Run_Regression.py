@@ -0,0 +1,28 @@
+import streamlit as st
+
+from regression import join_runs, load_run, record_changes
+
+st.set_page_config(layout="wide")
+st.title('Run Regression')
+st.markdown('Compares two runs stored with `python scoring.py run ... --leaves run.parquet`.')
+
+col1, col2 = st.columns(2)
+with col1:
+    base_file = st.text_input('Base run (Parquet):', 'base.parquet')
+with col2:
+    new_file = st.text_input('New run (Parquet):', 'new.parquet')
+
+if st.button('Compare runs'):
+    joined = join_runs(load_run(base_file), load_run(new_file))
+    per_record = record_changes(joined)
+    counts = joined["change"].value_counts()
+    st.markdown(f"## {counts['fixed']} fixed, {counts['regressed']} regressed")
+
+    st.subheader('Records by score change')
+    st.dataframe(per_record, use_container_width=True)
+
+    st.subheader('Flipped leaves')
+    flipped = joined[joined["change"].isin(["fixed", "regressed"])]
+    st.dataframe(flipped[["source", "reaction_id", "path", "change", "ground_truth", "llm_result_base",
+                          "llm_result_new"]].sort_values(["change", "source", "reaction_id", "path"]),
+                 use_container_width=True)
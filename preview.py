@@ -0,0 +1,192 @@
+import argparse
+import math
+import os
+import random
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from scoring import CREDIT_SCALE, load_manifest, score_pair, tally_total
+
+Z_95 = 1.959963984540054
+
+
+def stratum_of(entry):
+    # Default stratum: the model tag if the manifest has one, otherwise the prediction directory
+    return entry.get("model") or os.path.dirname(entry["prediction"])
+
+
+def reservoir_sample(items, k, rng):
+    # Algorithm R: uniform sample of k items from a stream of unknown length
+    sample = []
+    for n, item in enumerate(items):
+        if n < k:
+            sample.append(item)
+        else:
+            j = rng.randrange(n + 1)
+            if j < k:
+                sample[j] = item
+    return sample
+
+
+def allocate(k, sizes):
+    # Proportional stratum sample sizes summing to exactly k (largest-remainder rounding)
+    total = sum(sizes.values())
+    if not total:
+        return {name: 0 for name in sizes}
+    quotas = {name: k * size / total for name, size in sizes.items()}
+    counts = {name: int(quota) for name, quota in quotas.items()}
+    by_remainder = sorted(sizes, key=lambda name: quotas[name] - counts[name], reverse=True)
+    for name in by_remainder[:k - sum(counts.values())]:
+        counts[name] += 1
+    return counts
+
+
+def stratified_sample(entries, k=None, key=stratum_of, seed=0):
+    # Reservoir-sample each stratum proportionally to its size and interleave the strata,
+    # so every prefix of the returned order is itself roughly stratified
+    rng = random.Random(seed)
+    strata = {}
+    for entry in entries:
+        strata.setdefault(key(entry), []).append(entry)
+    total = sum(len(s) for s in strata.values())
+    k = total if k is None else min(k, total)
+    samples = {}
+    for name, size in allocate(k, {name: len(members) for name, members in strata.items()}).items():
+        samples[name] = reservoir_sample(strata[name], size, rng)
+        # The reservoir keeps manifest order when it holds the whole stratum; shuffle so every
+        # prefix is a random sample even if the manifest is sorted by date or source
+        rng.shuffle(samples[name])
+
+    order = []
+    taken = {name: 0 for name in samples}
+    while len(order) < sum(len(s) for s in samples.values()):
+        # Next pick from the stratum furthest behind its share
+        name = min((n for n in samples if taken[n] < len(samples[n])),
+                   key=lambda n: taken[n] / len(samples[n]))
+        order.append(samples[name][taken[name]])
+        taken[name] += 1
+    return order
+
+
+def _ratio_ci(stats):
+    # Ratio estimator sum(credit)/sum(total) over sampled pairs, with a linearised
+    # (cluster) standard error since leaves of one pair are not independent.
+    # stats = [n, sum s, sum t, sum s^2, sum t^2, sum s*t]
+    n, s, t, ss, tt, st = stats
+    if not t:
+        return float('nan'), float('nan'), float('nan')
+    ratio = s / t
+    if n < 2:
+        return ratio * 100, 0.0, 100.0
+    resid = max(0.0, ss - 2 * ratio * st + ratio * ratio * tt) / (n - 1)
+    se = math.sqrt(resid / n) / (t / n)
+    return ratio * 100, max(0.0, ratio - Z_95 * se) * 100, min(1.0, ratio + Z_95 * se) * 100
+
+
+def _add_stats(stats, same, total):
+    stats[0] += 1
+    stats[1] += same
+    stats[2] += total
+    stats[3] += same * same
+    stats[4] += total * total
+    stats[5] += same * total
+
+
+class RunningEstimate:
+    # Accumulates per-pair results and reports accuracy estimates with 95% intervals
+
+    def __init__(self, population=None):
+        self.population = population
+        self.overall = [0] * 6
+        self.fields = {}
+
+    def add(self, partial):
+        # Credit rather than exact matches, so free-text partial credit counts too
+        _add_stats(self.overall, partial["credit"] / CREDIT_SCALE, partial["n_leaves"])
+        for field, tally in partial["fields"].items():
+            _add_stats(self.fields.setdefault(field, [0] * 6), tally["credit"] / CREDIT_SCALE, tally_total(tally))
+
+    def snapshot(self):
+        n = self.overall[0]
+        perc, lo, hi = _ratio_ci(self.overall)
+        fields = {}
+        for field in sorted(self.fields):
+            # Pairs without this field contribute zeros, which the sums already account for
+            stats = list(self.fields[field])
+            stats[0] = n
+            f_perc, f_lo, f_hi = _ratio_ci(stats)
+            fields[field] = {"accuracy": f_perc, "ci_low": f_lo, "ci_high": f_hi}
+        return {
+            "n_sampled": n,
+            "population": self.population,
+            "perc_true": perc,
+            "ci": (lo, hi),
+            "width": hi - lo,
+            "fields": fields,
+        }
+
+
+def run_preview(entries, sample_size=None, target_width=2.0, min_pairs=30, workers=1, seed=0,
+                key=stratum_of):
+    # Score a stratified random sample of pairs and yield a snapshot after every finished pair.
+    # Stops once at least min_pairs are scored and the 95% interval is narrower than target_width points.
+    order = stratified_sample(entries, sample_size, key=key, seed=seed)
+    estimate = RunningEstimate(population=len(entries))
+
+    def done(snap):
+        return snap["n_sampled"] >= min_pairs and snap["width"] <= target_width
+
+    if workers <= 1:
+        for entry in order:
+            estimate.add(score_pair(entry))
+            snap = estimate.snapshot()
+            yield snap
+            if done(snap):
+                return
+        return
+
+    pending = iter(order)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        running = set()
+        for entry in pending:
+            running.add(pool.submit(score_pair, entry))
+            if len(running) >= 2 * workers:
+                break
+        while running:
+            finished, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                estimate.add(future.result())
+                snap = estimate.snapshot()
+                yield snap
+                if done(snap):
+                    for future in running:
+                        future.cancel()
+                    return
+                entry = next(pending, None)
+                if entry is not None:
+                    running.add(pool.submit(score_pair, entry))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Approximate accuracy from a stratified sample of a manifest")
+    parser.add_argument('manifest')
+    parser.add_argument('--sample-size', type=int)
+    parser.add_argument('--target-width', type=float, default=2.0, help="stop when the 95%% CI is this narrow")
+    parser.add_argument('--min-pairs', type=int, default=30)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    snap = None
+    for snap in run_preview(load_manifest(args.manifest), args.sample_size, args.target_width,
+                            args.min_pairs, args.workers, args.seed):
+        lo, hi = snap["ci"]
+        print(f"\r{snap['n_sampled']}/{snap['population']} pairs  "
+              f"accuracy {snap['perc_true']:.2f}% ({lo:.2f}-{hi:.2f})", end='', flush=True)
+    print()
+    if snap:
+        for field, m in snap["fields"].items():
+            print(f"  {field:60s} {m['accuracy']:6.2f}%  ({m['ci_low']:.2f}-{m['ci_high']:.2f})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+# How a leaf changed between the base run and the new run
+CHANGES = ["fixed", "regressed", "still wrong", "still right", "added", "removed"]
+
+
+def load_run(filenames):
+    # One stored run may be spread over several shard files (scoring.py --leaves)
+    if isinstance(filenames, str):
+        filenames = [filenames]
+    run = pd.concat([pd.read_parquet(f) for f in filenames], ignore_index=True)
+    # Shards have different dictionaries, so concat falls back to object columns; re-encode them
+    for column in run.columns:
+        if run[column].dtype == object or str(run[column].dtype) == 'str':
+            run[column] = run[column].astype('category')
+    return run
+
+
+def _shared_categories(base, new, column):
+    # Give a key column the same dictionary in both runs so the merge stays categorical
+    cats = union_categoricals([base[column].astype('category'), new[column].astype('category')],
+                              ignore_order=True).categories
+    return base[column].astype(pd.CategoricalDtype(cats)), new[column].astype(pd.CategoricalDtype(cats))
+
+
+def join_runs(base, new):
+    # Outer join of two runs on (source, reaction_id, path); every leaf gets a change label.
+    # Records without a reaction_id are numbered per file, so the ground truth file is part of the key.
+    # Runs stored before partial credit existed have no score column; their score is exact match
+    base = base.assign(is_same=base["status"] == "same")
+    new = new.assign(is_same=new["status"] == "same")
+    if "source" not in base:
+        base["source"] = ""
+    if "source" not in new:
+        new["source"] = ""
+    if "score" not in base:
+        base["score"] = base["is_same"].astype(float)
+    if "score" not in new:
+        new["score"] = new["is_same"].astype(float)
+    for key in ("source", "reaction_id", "path", "field"):
+        base[key], new[key] = _shared_categories(base, new, key)
+    # A run that scores the same ground truth twice (e.g. two models) can't be joined leaf by leaf;
+    # validate makes that fail instead of silently multiplying rows
+    joined = base[["source", "reaction_id", "path", "field", "ground_truth", "llm_result", "is_same", "score"]].merge(
+        new[["source", "reaction_id", "path", "field", "llm_result", "is_same", "score"]],
+        on=["source", "reaction_id", "path"], how="outer", suffixes=("_base", "_new"), indicator=True,
+        validate="one_to_one")
+    joined["field"] = joined["field_base"].fillna(joined["field_new"])
+    joined["is_same_base"] = joined["is_same_base"].astype("boolean")
+    joined["is_same_new"] = joined["is_same_new"].astype("boolean")
+    both = (joined["_merge"] == "both").to_numpy()
+    was = joined["is_same_base"].fillna(False).to_numpy(dtype=bool)
+    now = joined["is_same_new"].fillna(False).to_numpy(dtype=bool)
+    joined["change"] = pd.Categorical(np.select(
+        [both & ~was & now, both & was & ~now, both & ~was & ~now, both & was & now,
+         (joined["_merge"] == "right_only").to_numpy()],
+        CHANGES[:5], default="removed"), categories=CHANGES)
+    return joined.drop(columns=["field_base", "field_new", "_merge"])
+
+
+def record_changes(joined):
+    # Per reaction: mean leaf score in each run and the change, worst first
+    per_record = joined.assign(
+        fixed=joined["change"] == "fixed",
+        regressed=joined["change"] == "regressed",
+    ).groupby(["source", "reaction_id"], observed=True).agg(
+        base=("score_base", "mean"),
+        new=("score_new", "mean"),
+        fixed=("fixed", "sum"),
+        regressed=("regressed", "sum"),
+    )
+    per_record[["base", "new"]] = per_record[["base", "new"]].astype(float) * 100
+    per_record["delta"] = per_record["new"] - per_record["base"]
+    return per_record.sort_values("delta")
+
+
+def gate(joined, max_regressions=0, max_drop=0.0):
+    # CI check: fail when too many leaves regressed or overall accuracy dropped too much.
+    # Returns (passed, message).
+    n_regressed = int((joined["change"] == "regressed").sum())
+    base_acc = joined["score_base"].mean() * 100
+    new_acc = joined["score_new"].mean() * 100
+    drop = base_acc - new_acc
+    failures = []
+    if n_regressed > max_regressions:
+        failures.append(f"{n_regressed} regressed leaves > {max_regressions}")
+    if drop > max_drop:
+        failures.append(f"accuracy dropped {drop:.2f} points > {max_drop}")
+    message = (f"accuracy {base_acc:.2f}% -> {new_acc:.2f}%, "
+               f"{int((joined['change'] == 'fixed').sum())} fixed, {n_regressed} regressed")
+    if failures:
+        return False, message + "; FAILED: " + "; ".join(failures)
+    return True, message
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two stored scoring runs leaf by leaf")
+    parser.add_argument('--base', nargs='+', required=True, help="Parquet file(s) of the earlier run")
+    parser.add_argument('--new', nargs='+', required=True, help="Parquet file(s) of the later run")
+    parser.add_argument('--top', type=int, default=20, help="number of records to list")
+    parser.add_argument('--max-regressions', type=int, help="fail if more leaves than this regressed")
+    parser.add_argument('--max-drop', type=float, help="fail if accuracy dropped by more points than this")
+    args = parser.parse_args()
+
+    joined = join_runs(load_run(args.base), load_run(args.new))
+    print(joined["change"].value_counts().to_string())
+    print()
+    per_record = record_changes(joined)
+    print(per_record.head(args.top).to_string(float_format=lambda x: f"{x:.2f}"))
+
+    if args.max_regressions is None and args.max_drop is None:
+        return
+    max_regressions = args.max_regressions if args.max_regressions is not None else len(joined)
+    max_drop = args.max_drop if args.max_drop is not None else 100.0
+    passed, message = gate(joined, max_regressions, max_drop)
+    print()
+    print(message)
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,209 @@
+import argparse
+import copy
+import hashlib
+import html
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from string import Template
+
+from grounding import ground_record, highlight_html
+from scoring import (CREDIT_SCALE, annotate_differences, compare_leaves, comparison_settings, entry_id,
+                     leaf_credit, leaf_status, load_manifest, pair_records, read_json, text_credits)
+
+# Bump when the templates or page contents change so every page is re-rendered
+REPORT_VERSION = 2
+STATE_FILE = '.report_state.json'
+
+STYLE = """
+body { font-family: sans-serif; margin: 2em; }
+table { border-collapse: collapse; width: 100%; }
+td, th { border: 1px solid #ddd; padding: 4px 8px; text-align: left; vertical-align: top; }
+.diff { background-color: #F7FE2E; }
+.partial { background-color: #FCFFC2; }
+.cols { display: flex; gap: 1em; }
+.cols > div { flex: 1; }
+.text { white-space: pre-wrap; border: 1px solid #ddd; padding: 0.5em; }
+pre { background: #f6f6f6; padding: 0.5em; overflow-x: auto; }
+"""
+
+# Templates are parsed once at import time and reused for every page
+PAGE = Template("""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>$title</title><style>$style</style></head>
+<body>
+<p><a href="index.html">&larr; All reactions</a></p>
+<h1>$title</h1>
+<h2>Percent accuracy: $accuracy%</h2>
+<div class="cols">
+<div><h3>Ground Truth</h3><div class="text">$gt_text</div></div>
+<div><h3>LLM Result</h3><div class="text">$pred_text</div></div>
+</div>
+<h3>Comparison</h3>
+<table><tr><th>Path</th><th>Ground Truth</th><th>LLM Result</th><th>Is Same</th></tr>
+$rows
+</table>
+<h3>Tree View</h3>
+<div class="cols">
+<div><h4>Ground Truth</h4><pre>$gt_tree</pre></div>
+<div><h4>LLM Inferred</h4><pre>$pred_tree</pre></div>
+</div>
+</body></html>
+""")
+
+ROW = Template('<tr$cls><td>$path</td><td>$gt</td><td>$pred</td><td>$same</td></tr>')
+
+INDEX = Template("""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>LLM ORD Reaction Parser report</title><style>$style</style></head>
+<body>
+<h1>LLM ORD Reaction Parser report</h1>
+<h2>Percent accuracy: $accuracy% over $count reactions</h2>
+<table><tr><th>Reaction</th><th>Prediction file</th><th>Accuracy</th></tr>
+$rows
+</table>
+</body></html>
+""")
+
+
+def page_name(entry, reaction_id):
+    # Readable file stem plus a short hash of the entry id, so model_a/x.json and model_b/x.json
+    # get different pages
+    stem = os.path.splitext(os.path.basename(entry["prediction"]))[0]
+    digest = hashlib.sha1(entry_id(entry).encode()).hexdigest()[:8]
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', f"{stem}-{digest}-{reaction_id}") + '.html'
+
+
+def page_hash(gt, pred):
+    # Scores and partial-credit highlighting depend on the scoring version and settings too
+    payload = json.dumps([REPORT_VERSION, comparison_settings(), gt, pred], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def render_page(reaction_id, gt, pred, credits=None):
+    # Returns (html, score, n_total) for one ground truth / prediction record pair;
+    # score is the summed leaf credit, with partial credit for free-text fields
+    rows = []
+    score = 0.0
+    n_total = 0
+    for path, val1, val2 in compare_leaves(gt, pred):
+        if 'input_text' in path:
+            continue
+        status = leaf_status(val1, val2)
+        same = status == 'same'
+        credit = leaf_credit(path, val1, val2, status, credits) / CREDIT_SCALE
+        score += credit
+        n_total += 1
+        # Same path clean-up as the app's table view
+        path = path.replace('[0]:', '')
+        for removal in ("output_reaction_inputs:", "output_reaction_conditions:"):
+            path = path.replace(removal, '')
+        path = path.strip()
+        rows.append((path, ROW.substitute(
+            cls='' if same else ' class="partial"' if credit > 0 else ' class="diff"',
+            path=html.escape(path),
+            gt=html.escape(str(val1)), pred=html.escape(str(val2)),
+            same='Yes' if same else f'Partial ({credit:.2f})' if credit > 0 else 'No')))
+    rows = [row for _, row in sorted(rows)]
+
+    gt_text = gt.get('input_text', '') if isinstance(gt, dict) else ''
+    pred_text = pred.get('input_text', '') if isinstance(pred, dict) else ''
+    annotated = copy.deepcopy(pred)
+    annotate_differences(gt, annotated)
+    accuracy = score / n_total * 100 if n_total else 0.0
+    page = PAGE.substitute(
+        title=html.escape(str(reaction_id)),
+        style=STYLE,
+        accuracy=f"{accuracy:.2f}",
+        gt_text=highlight_html(gt_text, ground_record(gt, gt_text)),
+        pred_text=highlight_html(pred_text, ground_record(pred, pred_text)),
+        rows='\n'.join(rows),
+        gt_tree=html.escape(json.dumps(gt, indent=2, ensure_ascii=False)),
+        pred_tree=html.escape(json.dumps(annotated, indent=2, ensure_ascii=False)),
+    )
+    return page, score, n_total
+
+
+def render_entry(entry, out_dir, previous):
+    # Render every reaction of one manifest entry, skipping pages whose inputs are unchanged.
+    # previous maps page name -> stored state; returns (states, number of pages written).
+    states = {}
+    written = 0
+    records = list(pair_records(read_json(entry["ground_truth"]), read_json(entry["prediction"])))
+    credits = None
+    for rid, gt, pred in records:
+        name = page_name(entry, rid)
+        digest = page_hash(gt, pred)
+        old = previous.get(name)
+        if old and old["hash"] == digest and os.path.exists(os.path.join(out_dir, name)):
+            states[name] = old
+            continue
+        if credits is None:
+            # Free-text similarity for the whole entry in one batch, only once a page needs it
+            credits = text_credits([(g, p) for _, g, p in records])
+        page, score, n_total = render_page(rid, gt, pred, credits)
+        with open(os.path.join(out_dir, name), 'w', encoding='utf-8') as file:
+            file.write(page)
+        states[name] = {"hash": digest, "reaction_id": rid, "entry": entry_id(entry),
+                        "score": score, "n_total": n_total}
+        written += 1
+    return states, written
+
+
+def render_index(states):
+    # Index sorted by accuracy, worst reactions first
+    items = sorted(states.items(), key=lambda item: (item[1]["score"] / item[1]["n_total"]
+                                                     if item[1]["n_total"] else 0.0, item[0]))
+    rows = []
+    for name, state in items:
+        accuracy = state["score"] / state["n_total"] * 100 if state["n_total"] else 0.0
+        rows.append(f'<tr><td><a href="{html.escape(name)}">{html.escape(str(state["reaction_id"]))}</a></td>'
+                    f'<td>{html.escape(state["entry"])}</td><td>{accuracy:.2f}%</td></tr>')
+    score = sum(s["score"] for s in states.values())
+    n_total = sum(s["n_total"] for s in states.values())
+    return INDEX.substitute(style=STYLE, accuracy=f"{score / n_total * 100 if n_total else 0.0:.2f}",
+                            count=len(states), rows='\n'.join(rows))
+
+
+def export_report(entries, out_dir, workers=1):
+    # Returns (number of pages, number of pages re-rendered)
+    os.makedirs(out_dir, exist_ok=True)
+    state_path = os.path.join(out_dir, STATE_FILE)
+    previous = read_json(state_path) if os.path.exists(state_path) else {}
+
+    # States written before pages were keyed by entry have no "entry"; they are simply re-rendered
+    by_entry = {}
+    for name, state in previous.items():
+        by_entry.setdefault(state.get("entry"), {})[name] = state
+    args = ([entry, out_dir, by_entry.get(entry_id(entry), {})] for entry in entries)
+
+    if workers <= 1:
+        results = [render_entry(*a) for a in args]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(render_entry, *zip(*args), chunksize=16)) if entries else []
+
+    states = {}
+    written = 0
+    for entry_states, entry_written in results:
+        states.update(entry_states)
+        written += entry_written
+    with open(os.path.join(out_dir, 'index.html'), 'w', encoding='utf-8') as file:
+        file.write(render_index(states))
+    with open(state_path, 'w') as file:
+        json.dump(states, file)
+    return len(states), written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a static HTML report for every reaction in a manifest")
+    parser.add_argument('manifest')
+    parser.add_argument('-o', '--output', default='report')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    total, written = export_report(load_manifest(args.manifest), args.output, args.workers)
+    print(f"{total} reaction pages in {args.output}/ ({written} rendered, {total - written} unchanged)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,516 @@
+import argparse
+import hashlib
+import json
+import math
+import os
+import random
+import re
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from similarity import similarity_batch
+
+# Number of Poisson bootstrap replicates kept in every partial result
+N_BOOT = 200
+# Bump whenever the comparison rules change, so stored results are re-scored
+SCORING_VERSION = 2
+# Credit per leaf is kept in integer units so sums, and therefore merged shards, stay exact
+CREDIT_SCALE = 10000
+# Manifest entries loaded into memory at once while scoring a shard
+CHUNK_SIZE = 256
+# Free-text leaves (by last path component) that get partial credit from text similarity
+TEXT_SIMILARITY = {"fields": ["details"], "method": "jaccard", "analyzer": "word", "ngram": 1,
+                   "min_similarity": 0.0}
+
+
+def comparison_settings(text_similarity=None):
+    # Everything that affects a pair's score; stored results are only reused if this matches
+    return {"version": SCORING_VERSION, "n_boot": N_BOOT,
+            "text_similarity": dict(TEXT_SIMILARITY, **(text_similarity or {}))}
+
+
+def read_json(filename):
+    with open(filename, 'r') as file:
+        return json.load(file)
+
+
+def compare_leaves(dict1, dict2, prefix=""):
+    # Same walk as print_dicts_css in the app: keys come from the ground truth,
+    # missing keys become "-" and lists are zipped
+    if isinstance(dict1, dict) and isinstance(dict2, dict):
+        for key in dict1:
+            yield from compare_leaves(dict1.get(key, "-"), dict2.get(key, "-"), prefix=prefix + str(key) + ": ")
+    elif isinstance(dict1, list) and isinstance(dict2, list):
+        for idx, (val1, val2) in enumerate(zip(dict1, dict2)):
+            yield from compare_leaves(val1, val2, prefix=prefix + f"[{idx}]: ")
+    else:
+        yield prefix, dict1, dict2
+
+
+STATUSES = ["same", "different", "missing"]
+
+
+def new_tally():
+    return {"same": 0, "different": 0, "missing": 0, "credit": 0}
+
+
+def tally_total(tally):
+    return tally["same"] + tally["different"] + tally["missing"]
+
+
+def leaf_status(val1, val2):
+    if val1 == val2:
+        return 'same'
+    if val2 == "-":
+        return 'missing'
+    return 'different'
+
+
+# The same few hundred paths repeat across every record, so path normalisation is memoised per process
+@lru_cache(maxsize=65536)
+def normalize_path(path):
+    # "output_reaction_inputs: m1: components: [0]: value: " -> "output_reaction_inputs.m1.components[0].value"
+    parts = [p.strip() for p in path.split(':') if p.strip()]
+    return ''.join(p if p.startswith('[') or i == 0 else '.' + p for i, p in enumerate(parts))
+
+
+@lru_cache(maxsize=65536)
+def field_name(path):
+    # "output_reaction_inputs: m1: components: [0]: amount: mass: value: " -> "inputs.*.components.amount.mass.value"
+    parts = [p.strip() for p in path.split(':') if p.strip() and not re.fullmatch(r'\[\d+\]', p.strip())]
+    if parts and parts[0].startswith('output_reaction_'):
+        parts[0] = parts[0][len('output_reaction_'):]
+        if parts[0] == 'inputs' and len(parts) > 1:
+            parts[1] = '*'
+    return '.'.join(parts)
+
+
+def text_field(path):
+    # Last component of the field name ("details", "name", ...), matched against text_similarity["fields"]
+    return field_name(path).rsplit('.', 1)[-1]
+
+
+def pair_records(gt_records, pred_records):
+    # Join ground truth and predictions by reaction_id, falling back to position
+    if isinstance(gt_records, dict):
+        gt_records = [gt_records]
+    if isinstance(pred_records, dict):
+        pred_records = [pred_records]
+    by_id = {r.get('reaction_id'): r for r in pred_records if isinstance(r, dict) and r.get('reaction_id')}
+    for idx, gt in enumerate(gt_records):
+        rid = gt.get('reaction_id') if isinstance(gt, dict) else None
+        if rid in by_id:
+            yield rid, gt, by_id[rid]
+        elif idx < len(pred_records):
+            yield rid or f"#{idx}", gt, pred_records[idx]
+        else:
+            yield rid or f"#{idx}", gt, {}
+
+
+def poisson_weights(key, n_boot=N_BOOT):
+    # Poisson(1) bootstrap weights seeded by the record key, so a record gets the
+    # same weights whichever shard or process scores it
+    rng = random.Random(key)
+    limit = math.exp(-1.0)
+    weights = []
+    for _ in range(n_boot):
+        k, p = 0, rng.random()
+        while p > limit:
+            k += 1
+            p *= rng.random()
+        weights.append(k)
+    return weights
+
+
+def empty_partial(n_boot=N_BOOT):
+    return {
+        "n_pairs": 0,
+        "n_records": 0,
+        "n_leaves": 0,
+        "n_same": 0,
+        "credit": 0,
+        "fields": {},
+        "boot_credit": [0] * n_boot,
+        "boot_total": [0] * n_boot,
+    }
+
+
+# Define the annotate_differences function to compare json1 against json2
+# and annotate json2 with the differences
+def annotate_differences(base, compare, path=""):
+    if isinstance(base, dict) and isinstance(compare, dict):
+        for key in compare:
+            if key in base:
+                if base[key] != compare[key]:
+                    if isinstance(base[key], (dict, list)) and isinstance(compare[key], (dict, list)):
+                        annotate_differences(base[key], compare[key], path=f"{path}.{key}" if path else key)
+                    else:
+                        # Using symbols and text for visual emphasis
+                        compare[key] = f"{compare[key]} 🔴[DIFF]🔴"
+            else:
+                # Highlight additional elements uniquely
+                compare[key] = f"{compare[key]} ✅[ADDED]✅"
+        for key in base:
+            if key not in compare:
+                # Mark missing elements distinctly
+                compare[key] = "❌[MISSING]❌"
+    elif isinstance(base, list) and isinstance(compare, list):
+        min_len = min(len(base), len(compare))
+        for i in range(min_len):
+            if base[i] != compare[i]:
+                if isinstance(base[i], (dict, list)) and isinstance(compare[i], (dict, list)):
+                    annotate_differences(base[i], compare[i], path=f"{path}[{i}]")
+                else:
+                    compare[i] = f"{compare[i]} 🔴[DIFF]🔴"
+        if len(compare) > len(base):
+            for i in range(len(base), len(compare)):
+                compare[i] = f"{compare[i]} ✅[ADDED]✅"
+        elif len(compare) < len(base):
+            compare.extend(["❌[MISSING]❌"] * (len(base) - len(compare)))
+    else:
+        if base != compare:
+            return f"{compare} 🔴[DIFF]🔴"
+
+
+LEAF_COLUMNS = ["source", "reaction_id", "path", "field", "ground_truth", "llm_result", "gt_number", "llm_number", "status",
+                "score"]
+
+
+def text_credits(record_pairs, settings=None):
+    # Partial credit for every free-text leaf pair that is not an exact match.
+    # All such pairs (from every record given) are scored together in one vectorised batch
+    # over a shared vocabulary; returns {(field, gt text, llm text): credit in CREDIT_SCALE units},
+    # keyed by field so the same strings under a field without partial credit still score 0.
+    config = (settings or comparison_settings())["text_similarity"]
+    fields = set(config["fields"])
+    pairs = set()
+    if fields:
+        for gt, pred in record_pairs:
+            for path, val1, val2 in compare_leaves(gt, pred):
+                if (isinstance(val1, str) and isinstance(val2, str) and val1 != val2 and val2 != "-"
+                        and text_field(path) in fields):
+                    pairs.add((text_field(path), val1, val2))
+    if not pairs:
+        return {}
+    pairs = sorted(pairs)
+    sims = similarity_batch([(val1, val2) for _, val1, val2 in pairs],
+                            config["method"], config["analyzer"], config["ngram"])
+    return {pair: int(round(sim * CREDIT_SCALE)) if sim >= config["min_similarity"] else 0
+            for pair, sim in zip(pairs, sims.tolist())}
+
+
+def leaf_credit(path, val1, val2, status, credits):
+    if status == 'same':
+        return CREDIT_SCALE
+    if credits and isinstance(val1, str) and isinstance(val2, str):
+        return credits.get((text_field(path), val1, val2), 0)
+    return 0
+
+
+def as_number(value):
+    # Quantities are kept as floats next to the string form; everything else is NaN
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return float('nan')
+
+
+def leaf_frame(columns):
+    # Columnar leaf table: repeated strings (paths, units, roles, ...) are dictionary-encoded
+    # as categoricals, quantities are float64 and the status is a small fixed enum
+    frame = {}
+    for name, values in columns.items():
+        if name in ("gt_number", "llm_number", "score", "GT Value", "LLM Value", "Score"):
+            frame[name] = np.asarray(values, dtype=np.float64)
+        elif name in ("status", "Status"):
+            frame[name] = pd.Categorical(values, categories=STATUSES)
+        elif name == "Is Same":
+            frame[name] = np.asarray(values, dtype=bool)
+        else:
+            frame[name] = pd.Categorical(values)
+    return pd.DataFrame(frame)
+
+
+def diff_table(json1, json2, settings=None):
+    # The table view's diff: one row per ground truth leaf, built column by column.
+    # "Score" is 1 for exact matches and the text similarity for free-text fields.
+    credits = text_credits([(json1, json2)], settings)
+    columns = {"Path": [], "Ground Truth": [], "LLM Result": [], "GT Value": [], "LLM Value": [],
+               "Status": [], "Is Same": [], "Score": []}
+    for path, val1, val2 in compare_leaves(json1, json2):
+        status = leaf_status(val1, val2)
+        columns["Path"].append(path)
+        columns["Ground Truth"].append(str(val1))
+        columns["LLM Result"].append(str(val2))
+        columns["GT Value"].append(as_number(val1))
+        columns["LLM Value"].append(as_number(val2))
+        columns["Status"].append(status)
+        columns["Is Same"].append(status == 'same')
+        columns["Score"].append(leaf_credit(path, val1, val2, status, credits) / CREDIT_SCALE)
+    return leaf_frame(columns)
+
+
+def add_record(partial, key, gt, pred, leaves=None, reaction_id=None, credits=None, source=None):
+    # Score one ground truth / prediction record pair into a partial result.
+    # credits comes from text_credits(); without it only exact matches earn credit.
+    # If leaves is a list, one row per leaf (see LEAF_COLUMNS) is appended to it;
+    # source names the ground truth file so (source, reaction_id, path) identifies a leaf.
+    n_same = n_total = credit = 0
+    for path, val1, val2 in compare_leaves(gt, pred):
+        if 'input_text' in path:
+            continue
+        status = leaf_status(val1, val2)
+        leaf = leaf_credit(path, val1, val2, status, credits)
+        tally = partial["fields"].setdefault(field_name(path), new_tally())
+        tally[status] += 1
+        tally["credit"] += leaf
+        if leaves is not None:
+            leaves.append((source, reaction_id, normalize_path(path), field_name(path), str(val1), str(val2),
+                           as_number(val1), as_number(val2), status, leaf / CREDIT_SCALE))
+        n_total += 1
+        n_same += status == 'same'
+        credit += leaf
+    partial["n_records"] += 1
+    partial["n_leaves"] += n_total
+    partial["n_same"] += n_same
+    partial["credit"] += credit
+    for b, w in enumerate(poisson_weights(key, len(partial["boot_credit"]))):
+        if w:
+            partial["boot_credit"][b] += w * credit
+            partial["boot_total"][b] += w * n_total
+    return partial
+
+
+def combine_partial(into, part, sign=1):
+    # Add (or with sign=-1 remove) one partial result into another, in place
+    for name in ("n_pairs", "n_records", "n_leaves", "n_same", "credit"):
+        into[name] += sign * part[name]
+    for field, tally in part["fields"].items():
+        target = into["fields"].setdefault(field, new_tally())
+        for status, count in tally.items():
+            target[status] += sign * count
+        if sign < 0 and not any(target.values()):
+            del into["fields"][field]
+    into["boot_credit"] = [a + sign * b for a, b in zip(into["boot_credit"], part["boot_credit"])]
+    into["boot_total"] = [a + sign * b for a, b in zip(into["boot_total"], part["boot_total"])]
+    return into
+
+
+def merge_partials(partials):
+    # Partial results are plain sums, so merging is associative and order independent
+    merged = None
+    for part in partials:
+        if merged is None:
+            merged = empty_partial(len(part["boot_credit"]))
+        combine_partial(merged, part)
+    return merged if merged is not None else empty_partial()
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    if not values:
+        return float('nan')
+    pos = (len(values) - 1) * q
+    lo, hi = math.floor(pos), math.ceil(pos)
+    return values[lo] + (values[hi] - values[lo]) * (pos - lo)
+
+
+def finalize(partial, alpha=0.05):
+    # Turn a (merged) partial result into perc_true, a bootstrap interval and per-field metrics
+    n_leaves = partial["n_leaves"]
+    perc_true = partial["credit"] / CREDIT_SCALE / n_leaves * 100 if n_leaves else float('nan')
+    boot = [c / CREDIT_SCALE / t * 100 for c, t in zip(partial["boot_credit"], partial["boot_total"]) if t]
+    fields = {}
+    for field, tally in sorted(partial["fields"].items()):
+        total = tally_total(tally)
+        score = tally["credit"] / CREDIT_SCALE
+        fields[field] = {"same": tally["same"], "different": tally["different"], "missing": tally["missing"],
+                         "total": total, "score": score,
+                         "accuracy": score / total * 100 if total else float('nan')}
+    return {
+        "n_pairs": partial["n_pairs"],
+        "n_records": partial["n_records"],
+        "n_leaves": n_leaves,
+        "perc_true": perc_true,
+        "ci": (_percentile(boot, alpha / 2), _percentile(boot, 1 - alpha / 2)),
+        "fields": fields,
+    }
+
+
+def load_manifest(filename):
+    # A manifest is a JSON list of {"ground_truth": ..., "prediction": ...} entries,
+    # with paths relative to the manifest file. Each entry's id is its prediction path
+    # as written in the manifest, so it is the same on every host.
+    base = os.path.dirname(os.path.abspath(filename))
+    entries = []
+    for entry in read_json(filename):
+        entry = dict(entry)
+        entry.setdefault("id", os.path.normpath(entry["prediction"]))
+        entry.setdefault("source", os.path.normpath(entry["ground_truth"]))
+        for key in ("ground_truth", "prediction"):
+            entry[key] = os.path.join(base, entry[key])
+        entries.append(entry)
+    return entries
+
+
+def entry_id(entry):
+    # Unique per manifest entry: two models' "x.json" in different directories must not collide
+    return entry.get("id") or os.path.normpath(entry["prediction"])
+
+
+def source_id(entry):
+    # The ground truth file as written in the manifest; stable across runs of different models
+    return entry.get("source") or os.path.normpath(entry["ground_truth"])
+
+
+def shard_of(entry, n_shards):
+    # Stable shard assignment, independent of manifest order and of the host
+    digest = hashlib.sha1(entry_id(entry).encode()).hexdigest()
+    return int(digest, 16) % n_shards
+
+
+def load_pair(entry):
+    # [(reaction_id, gt record, predicted record), ...] for one manifest entry
+    return list(pair_records(read_json(entry["ground_truth"]), read_json(entry["prediction"])))
+
+
+def _add_pair(partial, entry, records, leaves, credits):
+    for rid, gt, pred in records:
+        add_record(partial, f"{entry_id(entry)}:{rid}", gt, pred, leaves, rid, credits, source_id(entry))
+    partial["n_pairs"] += 1
+    return partial
+
+
+def score_pair(entry, partial=None, leaves=None, settings=None):
+    settings = settings or comparison_settings()
+    partial = partial if partial is not None else empty_partial(settings["n_boot"])
+    records = load_pair(entry)
+    credits = text_credits([(gt, pred) for _, gt, pred in records], settings)
+    return _add_pair(partial, entry, records, leaves, credits)
+
+
+def _score_chunk(partial, chunk, leaves, settings):
+    loaded = [(entry, load_pair(entry)) for entry in chunk]
+    credits = text_credits([(gt, pred) for _, records in loaded for _, gt, pred in records], settings)
+    for entry, records in loaded:
+        _add_pair(partial, entry, records, leaves, credits)
+
+
+def score_shard(entries, n_shards=1, index=0, with_leaves=False, settings=None, chunk_size=CHUNK_SIZE):
+    # Returns the shard's partial result, or (partial, leaf rows) with with_leaves.
+    # Entries are loaded and scored chunk_size at a time, with one similarity batch per chunk;
+    # similarities don't depend on the batch, so the totals are the same for any chunk size.
+    settings = settings or comparison_settings()
+    partial = empty_partial(settings["n_boot"])
+    leaves = [] if with_leaves else None
+    chunk = []
+    for entry in entries:
+        if shard_of(entry, n_shards) != index:
+            continue
+        chunk.append(entry)
+        if len(chunk) >= chunk_size:
+            _score_chunk(partial, chunk, leaves, settings)
+            chunk = []
+    if chunk:
+        _score_chunk(partial, chunk, leaves, settings)
+    return (partial, leaves) if with_leaves else partial
+
+
+def score_manifest(entries, n_shards=1, workers=1, with_leaves=False, settings=None):
+    # Local stand-in for a multi-host run: every shard is scored independently and reduced
+    args = ([entries] * n_shards, [n_shards] * n_shards, range(n_shards), [with_leaves] * n_shards,
+            [settings] * n_shards)
+    if workers <= 1:
+        parts = list(map(score_shard, *args))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(score_shard, *args))
+    if not with_leaves:
+        return merge_partials(parts)
+    return merge_partials(p for p, _ in parts), [row for _, rows in parts for row in rows]
+
+
+def write_leaves(rows, filename):
+    # Store per-leaf results as a Parquet table so runs can be compared later (see regression.py)
+    columns = dict(zip(LEAF_COLUMNS, zip(*rows))) if rows else {name: [] for name in LEAF_COLUMNS}
+    leaf_frame(columns).to_parquet(filename, index=False)
+
+
+def print_summary(result):
+    lo, hi = result["ci"]
+    print(f"Pairs: {result['n_pairs']}  Records: {result['n_records']}  Leaves: {result['n_leaves']}")
+    print(f"Percent accuracy: {result['perc_true']:.2f}%  (95% CI {lo:.2f}-{hi:.2f})")
+    for field, m in result["fields"].items():
+        print(f"  {field:60s} {m['accuracy']:6.2f}%  same={m['same']} different={m['different']} "
+              f"missing={m['missing']} score={m['score']:g}")
+
+
+def add_text_similarity_arguments(parser):
+    parser.add_argument('--text-fields', nargs='*', default=TEXT_SIMILARITY["fields"],
+                        help="free-text fields scored by similarity (last path component); none = exact only")
+    parser.add_argument('--text-method', choices=['jaccard', 'cosine'], default=TEXT_SIMILARITY["method"])
+    parser.add_argument('--text-analyzer', choices=['word', 'char'], default=TEXT_SIMILARITY["analyzer"])
+    parser.add_argument('--ngram', type=int, default=TEXT_SIMILARITY["ngram"])
+    parser.add_argument('--min-similarity', type=float, default=TEXT_SIMILARITY["min_similarity"],
+                        help="similarities below this earn no credit")
+
+
+def settings_from_args(args):
+    return comparison_settings({"fields": args.text_fields, "method": args.text_method,
+                                "analyzer": args.text_analyzer, "ngram": args.ngram,
+                                "min_similarity": args.min_similarity})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score LLM extractions against ORD ground truth")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('shard', help="score one shard of a manifest into a partial result")
+    p.add_argument('manifest')
+    p.add_argument('--shards', type=int, required=True)
+    p.add_argument('--index', type=int, required=True)
+    p.add_argument('-o', '--output', required=True)
+    p.add_argument('--leaves', help="also write per-leaf results to this Parquet file")
+    add_text_similarity_arguments(p)
+
+    p = sub.add_parser('reduce', help="merge partial results and print the final metrics")
+    p.add_argument('partials', nargs='+')
+    p.add_argument('-o', '--output')
+
+    p = sub.add_parser('run', help="shard and reduce locally with a process pool")
+    p.add_argument('manifest')
+    p.add_argument('--shards', type=int, default=os.cpu_count() or 1)
+    p.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    p.add_argument('-o', '--output')
+    p.add_argument('--leaves', help="also write per-leaf results to this Parquet file")
+    add_text_similarity_arguments(p)
+
+    args = parser.parse_args()
+    if args.command == 'shard':
+        partial = score_shard(load_manifest(args.manifest), args.shards, args.index, bool(args.leaves),
+                              settings_from_args(args))
+        if args.leaves:
+            partial, leaves = partial
+            write_leaves(leaves, args.leaves)
+        with open(args.output, 'w') as file:
+            json.dump(partial, file)
+        return
+    if args.command == 'reduce':
+        result = finalize(merge_partials(read_json(f) for f in args.partials))
+    else:
+        partial = score_manifest(load_manifest(args.manifest), args.shards, args.workers, bool(args.leaves),
+                                 settings_from_args(args))
+        if args.leaves:
+            partial, leaves = partial
+            write_leaves(leaves, args.leaves)
+        result = finalize(partial)
+    print_summary(result)
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(result, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,211 @@
+import argparse
+import copy
+import json
+import os
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from grounding import ground_record
+from scoring import (add_record, annotate_differences, diff_table, empty_partial, entry_id, finalize,
+                     pair_records, read_json, text_credits)
+
+
+class _Flight:
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class ResultCache:
+    # Thread-safe LRU cache bounded by an approximate size in bytes.
+    # Concurrent requests for the same missing key are deduplicated: one caller computes,
+    # the others wait for its result (single flight).
+
+    def __init__(self, max_bytes=256 << 20):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.data = OrderedDict()
+        self.inflight = {}
+        self.lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get(self, key, compute, cost=lambda value: 1):
+        with self.lock:
+            if key in self.data:
+                self.data.move_to_end(key)
+                self.hits += 1
+                return self.data[key][0]
+            flight = self.inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self.inflight[key] = _Flight()
+                self.misses += 1
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            value = compute()
+            size = cost(value)
+        except BaseException as error:
+            # Nothing is cached; waiters get the error, or a RuntimeError if the leader was
+            # interrupted (KeyboardInterrupt, a Streamlit rerun), and a later call retries
+            if not isinstance(error, Exception):
+                error = RuntimeError(f"computation of {key!r} was interrupted")
+            flight.error = error
+            with self.lock:
+                del self.inflight[key]
+            flight.event.set()
+            raise
+        with self.lock:
+            del self.inflight[key]
+            self.data[key] = (value, size)
+            self.size += size
+            while self.size > self.max_bytes and len(self.data) > 1:
+                _, (_, old_size) = self.data.popitem(last=False)
+                self.size -= old_size
+        flight.value = value
+        flight.event.set()
+        return value
+
+    def stats(self):
+        with self.lock:
+            return {"entries": len(self.data), "bytes": self.size, "hits": self.hits, "misses": self.misses}
+
+
+def _file_key(filename):
+    filename = os.path.realpath(filename)
+    return filename, os.path.getmtime(filename)
+
+
+def _frame_cost(df):
+    return int(df.memory_usage(deep=True).sum())
+
+
+class ComparisonService:
+    # Owns the process-wide cache of parsed documents, diff tables, trees and scores.
+    # Results are shared between callers and must be treated as read-only.
+
+    def __init__(self, root='.', max_bytes=256 << 20):
+        self.root = os.path.realpath(root)
+        self.cache = ResultCache(max_bytes)
+
+    def _resolve(self, filename):
+        # Only serve files below the root directory
+        path = os.path.realpath(os.path.join(self.root, filename))
+        if os.path.commonpath([path, self.root]) != self.root:
+            raise PermissionError(filename)
+        return path
+
+    def document(self, filename):
+        key = _file_key(self._resolve(filename))
+        return self.cache.get(("document",) + key, lambda: read_json(key[0]), lambda _: os.path.getsize(key[0]))
+
+    def table(self, gt_file, pred_file):
+        # Diff table for the table view, with the "[0]:" list prefix removed like the app shows it
+        def compute():
+            df = diff_table(self.document(gt_file), self.document(pred_file))
+            df['Path'] = df['Path'].str.replace(r'\[0\]:', '', regex=True).astype('category')
+            return df
+        key = ("table",) + _file_key(self._resolve(gt_file)) + _file_key(self._resolve(pred_file))
+        return self.cache.get(key, compute, _frame_cost)
+
+    def tree(self, gt_file, pred_file):
+        # Prediction annotated with DIFF/ADDED/MISSING markers for the tree view
+        def compute():
+            annotated = copy.deepcopy(self.document(pred_file))
+            annotate_differences(self.document(gt_file), annotated)
+            return annotated
+        key = ("tree",) + _file_key(self._resolve(gt_file)) + _file_key(self._resolve(pred_file))
+        return self.cache.get(key, compute, lambda _: os.path.getsize(key[1]) * 2)
+
+    def score(self, gt_file, pred_file):
+        # perc_true and per-field metrics for the pair, computed like scoring.py does; the bootstrap
+        # key matches a manifest entry written relative to the root, so the CI matches too
+        def compute():
+            partial = empty_partial()
+            records = list(pair_records(self.document(gt_file), self.document(pred_file)))
+            credits = text_credits([(gt, pred) for _, gt, pred in records])
+            entry = {"ground_truth": gt_file, "prediction": pred_file}
+            for rid, gt, pred in records:
+                add_record(partial, f"{entry_id(entry)}:{rid}", gt, pred, credits=credits)
+            partial["n_pairs"] = 1
+            return finalize(partial)
+        key = ("score",) + _file_key(self._resolve(gt_file)) + _file_key(self._resolve(pred_file))
+        return self.cache.get(key, compute, lambda _: 4096)
+
+    def grounding(self, filename):
+        # Grounding rows for the first record of a file, matched against its own input_text
+        def compute():
+            doc = self.document(filename)
+            record = doc[0] if isinstance(doc, list) and len(doc) > 0 else {}
+            return ground_record(record, record.get('input_text', '') if isinstance(record, dict) else '')
+        key = ("grounding",) + _file_key(self._resolve(filename))
+        return self.cache.get(key, compute, lambda rows: 256 * len(rows))
+
+
+def make_handler(service):
+    class Handler(BaseHTTPRequestHandler):
+        # GET /table, /tree, /score with ?gt=<file>&pred=<file>, GET /stats
+
+        def _send(self, status, payload):
+            body = json.dumps(payload, default=str).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = {k: v[0] for k, v in parse_qs(url.query).items()}
+            try:
+                if url.path == '/stats':
+                    return self._send(200, service.cache.stats())
+                if url.path not in ('/table', '/tree', '/score'):
+                    return self._send(404, {"error": "unknown endpoint"})
+                gt, pred = query['gt'], query['pred']
+                if url.path == '/table':
+                    df = service.table(gt, pred)
+                    payload = {"columns": list(df.columns),
+                               "rows": df.astype(object).where(df.notna(), None).values.tolist()}
+                elif url.path == '/tree':
+                    payload = service.tree(gt, pred)
+                else:
+                    payload = service.score(gt, pred)
+                self._send(200, payload)
+            except KeyError as error:
+                self._send(400, {"error": f"missing parameter {error}"})
+            except PermissionError as error:
+                self._send(403, {"error": f"outside the served directory: {error}"})
+            except (FileNotFoundError, ValueError) as error:
+                self._send(404, {"error": str(error)})
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve diff tables, trees and scores as JSON")
+    parser.add_argument('--root', default='.', help="directory holding the JSON files")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8600)
+    parser.add_argument('--cache-mb', type=int, default=256)
+    args = parser.parse_args()
+
+    service = ComparisonService(args.root, args.cache_mb << 20)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(service))
+    print(f"Serving {service.root} on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
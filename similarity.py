@@ -0,0 +1,75 @@
+import re
+
+import numpy as np
+
+WORD_RE = re.compile(r'\w+')
+
+
+def tokenize(text, analyzer='word', ngram=1):
+    # Lowercased word n-grams, or character n-grams over the space-padded text
+    text = str(text).lower()
+    if analyzer == 'char':
+        text = f" {' '.join(WORD_RE.findall(text))} "
+        return [text[i:i + ngram] for i in range(max(0, len(text) - ngram + 1))]
+    words = WORD_RE.findall(text)
+    if ngram <= 1:
+        return words
+    return [' '.join(words[i:i + ngram]) for i in range(max(0, len(words) - ngram + 1))]
+
+
+class Vocabulary:
+    # Token -> column id, shared by every text scored in a run
+
+    def __init__(self):
+        self.ids = {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def encode(self, tokens):
+        ids = self.ids
+        return [ids.setdefault(token, len(ids)) for token in tokens]
+
+
+def _encode(texts, vocab, analyzer, ngram):
+    # Row/column arrays of the sparse (texts x vocabulary) occurrence matrix
+    rows, cols = [], []
+    for i, text in enumerate(texts):
+        ids = vocab.encode(tokenize(text, analyzer, ngram))
+        rows.extend([i] * len(ids))
+        cols.extend(ids)
+    return np.asarray(rows, dtype=np.int64), np.asarray(cols, dtype=np.int64)
+
+
+def similarity_batch(pairs, method='jaccard', analyzer='word', ngram=1, vocab=None):
+    # Similarity in [0, 1] for every (text1, text2) pair, all pairs in one vectorised pass.
+    # Each side is a sparse count matrix stored as sorted linear keys row * V + token;
+    # overlaps come from intersecting the key arrays and per-row sums from bincount.
+    n = len(pairs)
+    if not n:
+        return np.zeros(0)
+    vocab = Vocabulary() if vocab is None else vocab
+    rows_a, cols_a = _encode([a for a, _ in pairs], vocab, analyzer, ngram)
+    rows_b, cols_b = _encode([b for _, b in pairs], vocab, analyzer, ngram)
+    width = max(len(vocab), 1)
+    keys_a, counts_a = np.unique(rows_a * width + cols_a, return_counts=True)
+    keys_b, counts_b = np.unique(rows_b * width + cols_b, return_counts=True)
+    common, idx_a, idx_b = np.intersect1d(keys_a, keys_b, assume_unique=True, return_indices=True)
+
+    if method == 'cosine':
+        dot = np.bincount(common // width, weights=counts_a[idx_a] * counts_b[idx_b], minlength=n)
+        norm_a = np.sqrt(np.bincount(keys_a // width, weights=counts_a.astype(float) ** 2, minlength=n))
+        norm_b = np.sqrt(np.bincount(keys_b // width, weights=counts_b.astype(float) ** 2, minlength=n))
+        denom = norm_a * norm_b
+        sim = np.divide(dot, denom, out=np.zeros(n), where=denom > 0)
+        empty = (norm_a == 0) & (norm_b == 0)
+    elif method == 'jaccard':
+        inter = np.bincount(common // width, minlength=n).astype(float)
+        union = np.bincount(keys_a // width, minlength=n) + np.bincount(keys_b // width, minlength=n) - inter
+        sim = np.divide(inter, union, out=np.zeros(n), where=union > 0)
+        empty = union == 0
+    else:
+        raise ValueError(f"unknown similarity method: {method}")
+    # Two texts without any tokens are as similar as they can be
+    sim[empty] = 1.0
+    return np.clip(sim, 0.0, 1.0)
@@ -1,33 +1,19 @@
 import streamlit as st
-import pandas as pd
-import json
+import numpy as np
 import os
-import copy
-
-# Assuming your read_json function remains the same
-def read_json(filename):
-    with open(filename, 'r') as file:
-        return json.load(file)
-
-def print_dicts_css(dict1, dict2):
-    # Your recursive_print function remains the same
-    def recursive_print(dict1, dict2, prefix=""):
-        rows = []
-        if isinstance(dict1, dict) and isinstance(dict2, dict):
-            keys_sorted = sorted(dict1, key=lambda k: list(dict1.keys()).index(k))
-            for key in keys_sorted:
-                rows += recursive_print(dict1.get(key, "-"), dict2.get(key, "-"), prefix=prefix + str(key) + ": ")
-        elif isinstance(dict1, list) and isinstance(dict2, list):
-            for idx, (val1, val2) in enumerate(zip(dict1, dict2)):
-                rows += recursive_print(val1, val2, prefix=prefix + f"[{idx}]: ")
-        else:
-            is_same = dict1 == dict2
-            rows.append({"Path": f"{prefix}", "Ground Truth": str(dict1), "LLM Result": str(dict2), "Is Same": is_same})
-        return rows
-    
-    return recursive_print(dict1, dict2)
+from grounding import highlight_html
+from service import ComparisonService
+
+# One comparison service per server process: parsed files, diff tables, trees and scores are
+# shared by all sessions, and concurrent identical requests are computed only once.
+# Everything it returns is shared, so the page must not modify it in place.
+@st.cache_resource
+def get_service():
+    return ComparisonService('.')
 
 st.set_page_config(layout="wide")
+
+service = get_service()
 st.title('LLM ORD Reaction Parser')
 st.markdown('## JSON Comparison Result')
 
@@ -43,8 +29,8 @@ with col2:
     selected_json2 = st.selectbox('Select the second JSON file:', json_files, index=1 if len(json_files) > 1 else 0)  # Default to second file
 
 # 3. Load and compare the selected JSON files
-json1 = read_json(selected_json1)
-json2 = read_json(selected_json2)
+json1 = service.document(selected_json1)
+json2 = service.document(selected_json2)
 
 # Assuming json1 and json2 are lists and you want the 'input_text' from the first item
 if isinstance(json1, list) and len(json1) > 0:
@@ -58,17 +44,30 @@ else:
     llm_result_text = 'JSON 2 is not a list or is empty'
 
 
-rows = print_dicts_css(json1, json2)
-df = pd.DataFrame(rows)
-df['Path'] = df['Path'].str.replace(r'\[0\]:', '', regex=True)
-perc_true = ((df["Is Same"].sum() - 1) / (df.shape[0]-1)) * 100
+# Categorical columns: paths, units, roles etc. are stored once per distinct value
+df = service.table(selected_json1, selected_json2)
+grounding1 = service.grounding(selected_json1)
+grounding2 = service.grounding(selected_json2)
 col1, col2 = st.columns(2)  # Creates two columns
 
+# Grounding check: which extracted values actually occur in the procedure text
+def text_pane(label, text, grounding):
+    st.markdown(f"**{label}**")
+    st.markdown(
+        f'<div style="height:300px;overflow-y:auto;white-space:pre-wrap;border:1px solid #ddd;'
+        f'padding:0.5em;">{highlight_html(text, grounding)}</div>',
+        unsafe_allow_html=True)
+
 with col1:  # With the first column
-    st.text_area("Ground Truth", ground_truth_text, height=300)
+    text_pane("Ground Truth", ground_truth_text, grounding1)
 
 with col2:  # With the second column
-    st.text_area("LLM Result", llm_result_text, height=300)
+    text_pane("LLM Result", llm_result_text, grounding2)
+    ungrounded = [row for row in grounding2 if not row["Found"]]
+    if ungrounded:
+        with st.expander(f"{len(ungrounded)} LLM value(s) not found in the procedure (possibly hallucinated)"):
+            for row in ungrounded:
+                st.markdown(f"**{row['Path']}** `{row['Value']}`")
 
 # Streamlit UI
 
@@ -82,32 +81,35 @@ def highlight_mismatches(s):
 
 # Assuming you've already prepared your DataFrame 'df'
 
-# Calculate percent accuracy as before
-if 'Path' in df.columns and df.iloc[0]['Path'] == 'input_text:':
-    perc_true = ((df.iloc[1:]["Is Same"].sum()) / (df.shape[0] - 1)) * 100
-    # Drop the first row as it's labeled 'input_text'
-    df = df.drop(df.index[0]).reset_index(drop=True)
-else:
-    perc_true = ((df["Is Same"].sum()) / df.shape[0]) * 100
+# Same number as scoring.py and the service's /score endpoint
+perc_true = service.score(selected_json1, selected_json2)["perc_true"]
 
 st.markdown(f"## Percent accuracy: {perc_true:.2f}%")
-df = df[~df["Path"].str.contains("input_text", na=False)]
+df = df[~df["Path"].str.contains("input_text", na=False)].reset_index(drop=True)
 
 # Function to apply conditional formatting and return HTML
 
 def dataframe_to_html_with_style(df):
-    # Clone the DataFrame for styling
-    styled_df = df.copy()
-    
-    # Apply conditional formatting
-    styled_df['Is Same'] = styled_df['Is Same'].map(lambda x: 'Yes' if x else 'No')
-    styled_df['LLM Result'] = styled_df.apply(
-        lambda row: f'<span style="background-color:#F7FE2E;">{row["LLM Result"]}</span>' if row['Is Same'] == 'No' else row['LLM Result'], axis=1)
-    
+    # Only the display columns; the typed value/status columns stay out of the HTML
+    styled_df = df[["Path", "Ground Truth", "LLM Result", "Is Same"]].copy()
+    is_same = styled_df['Is Same'].to_numpy()
+    score = df['Score'].to_numpy()
+    partial = ~is_same & (score > 0)
+
+    # Apply conditional formatting; free-text fields with partial credit get a lighter highlight
+    llm_result = styled_df['LLM Result'].astype(str)
+    color = np.where(partial, '#FCFFC2', '#F7FE2E')
+    styled_df['LLM Result'] = llm_result.where(
+        is_same, '<span style="background-color:' + color + ';">' + llm_result + '</span>')
+    styled_df['Is Same'] = np.where(is_same, 'Yes', np.where(
+        partial, np.char.add(np.char.add('Partial (', np.char.mod('%.2f', score)), ')'), 'No'))
+
     # Remove specified substrings from the "Path" column
     removals = ["output_reaction_inputs", "output_reaction_conditions"]
+    path = styled_df['Path'].astype(str)
     for removal in removals:
-        styled_df['Path'] = styled_df['Path'].str.replace(removal + ":", "", regex=False).str.strip()
+        path = path.str.replace(removal + ":", "", regex=False).str.strip()
+    styled_df['Path'] = path
 
     # Sort the DataFrame by the "Path" column in alphabetical order
     styled_df = styled_df.sort_values(by='Path')
@@ -149,56 +151,13 @@ def display_tree_view(obj1, obj2, path=''):
     else:
         st.markdown(f"**{path}:** `{obj1}` ≠ `{obj2}`", unsafe_allow_html=True)
 
-import streamlit as st
-import streamlit as st
-import copy
-
-# Define the annotate_differences function to compare json1 against json2
-# and annotate json2 with the differences
-def annotate_differences(base, compare, path=""):
-    if isinstance(base, dict) and isinstance(compare, dict):
-        for key in compare:
-            if key in base:
-                if base[key] != compare[key]:
-                    if isinstance(base[key], (dict, list)) and isinstance(compare[key], (dict, list)):
-                        annotate_differences(base[key], compare[key], path=f"{path}.{key}" if path else key)
-                    else:
-                        # Using symbols and text for visual emphasis
-                        compare[key] = f"{compare[key]} 🔴[DIFF]🔴"
-            else:
-                # Highlight additional elements uniquely
-                compare[key] = f"{compare[key]} ✅[ADDED]✅"
-        for key in base:
-            if key not in compare:
-                # Mark missing elements distinctly
-                compare[key] = "❌[MISSING]❌"
-    elif isinstance(base, list) and isinstance(compare, list):
-        min_len = min(len(base), len(compare))
-        for i in range(min_len):
-            if base[i] != compare[i]:
-                if isinstance(base[i], (dict, list)) and isinstance(compare[i], (dict, list)):
-                    annotate_differences(base[i], compare[i], path=f"{path}[{i}]")
-                else:
-                    compare[i] = f"{compare[i]} 🔴[DIFF]🔴"
-        if len(compare) > len(base):
-            for i in range(len(base), len(compare)):
-                compare[i] = f"{compare[i]} ✅[ADDED]✅"
-        elif len(compare) < len(base):
-            compare.extend(["❌[MISSING]❌"] * (len(base) - len(compare)))
-    else:
-        if base != compare:
-            return f"{compare} 🔴[DIFF]🔴"
 # Adjusted "Tree View" option
 if view_option == 'Table View':
     html = dataframe_to_html_with_style(df)
     st.markdown(html, unsafe_allow_html=True)
 elif view_option == 'Tree View':
-    json1 = read_json(selected_json1)
-    json2 = read_json(selected_json2)
-    
-    # Annotate json2 based on differences from json1
-    annotated_json2 = copy.deepcopy(json2)
-    annotate_differences(json1, annotated_json2)
+    # json2 annotated with the differences from json1
+    annotated_json2 = service.tree(selected_json1, selected_json2)
 
     col1, col2 = st.columns(2)
     with col1:
@@ -207,4 +166,3 @@ elif view_option == 'Tree View':
     with col2:
         st.subheader("LLM Inferred")
         st.json(annotated_json2)
-
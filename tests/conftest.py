@@ -0,0 +1,37 @@
+import copy
+import json
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from scoring import load_manifest  # noqa: E402
+
+
+def _write_manifest(tmp_path, n=12):
+    # Two models in separate directories with identically named prediction files
+    gt = json.load(open(os.path.join(ROOT, 'example1.json')))
+    llm = json.load(open(os.path.join(ROOT, 'example3.json')))
+    entries = []
+    for model in ('model_a', 'model_b'):
+        (tmp_path / model).mkdir()
+    (tmp_path / 'gt').mkdir()
+    for i in range(n):
+        truth = copy.deepcopy(gt)
+        truth[0]['reaction_id'] = f'r{i}'
+        (tmp_path / 'gt' / f'{i}.json').write_text(json.dumps(truth))
+        for model, source in (('model_a', gt), ('model_b', gt if i % 2 else llm)):
+            pred = copy.deepcopy(source)
+            pred[0]['reaction_id'] = f'r{i}'
+            (tmp_path / model / f'{i}.json').write_text(json.dumps(pred))
+            entries.append({"ground_truth": f'gt/{i}.json', "prediction": f'{model}/{i}.json'})
+    (tmp_path / 'manifest.json').write_text(json.dumps(entries))
+    return load_manifest(str(tmp_path / 'manifest.json'))
+
+
+@pytest.fixture
+def write_manifest():
+    return _write_manifest
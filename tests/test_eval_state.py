@@ -0,0 +1,43 @@
+import json
+import os
+
+from eval_state import new_state, update_state
+from scoring import finalize, score_manifest
+
+
+def bump_mtime(filename, step):
+    st = os.stat(filename)
+    os.utime(filename, ns=(st.st_atime_ns, st.st_mtime_ns + step * 1_000_000_000))
+
+
+def test_incremental_state_matches_a_full_run(tmp_path, write_manifest):
+    entries = write_manifest(tmp_path, n=6)
+    state = new_state()
+    assert update_state(state, entries) == len(entries)
+    full = finalize(score_manifest(entries))
+    assert finalize(state["aggregate"]) == full
+
+    # Unchanged files are skipped by stat; a touched but identical file by its content hash
+    assert update_state(state, entries) == 0
+    bump_mtime(entries[0]["prediction"], 1)
+    assert update_state(state, entries) == 0
+
+    # A half-written prediction keeps its old result until it parses
+    changed = entries[1]["prediction"]
+    with open(changed) as file:
+        records = json.load(file)
+    with open(changed, 'w') as file:
+        file.write(json.dumps(records)[:100])
+    bump_mtime(changed, 2)
+    assert update_state(state, entries) == 0
+    assert finalize(state["aggregate"]) == full
+
+    # Once complete, the changed pair is subtracted and re-added; a deleted pair is pruned
+    records[0]["reaction_id"] = "renamed"
+    with open(changed, 'w') as file:
+        json.dump(records, file)
+    bump_mtime(changed, 3)
+    os.remove(entries[2]["prediction"])
+    assert update_state(state, entries) == 2
+    remaining = entries[:2] + entries[3:]
+    assert finalize(state["aggregate"]) == finalize(score_manifest(remaining))
@@ -0,0 +1,31 @@
+from grounding import Automaton, _boundary_ok, ground_record, surface_form
+
+
+def found(pattern, text):
+    automaton = Automaton([pattern])
+    return [(start, end) for _, start, end in automaton.finditer(text) if _boundary_ok(text, start, end, pattern)]
+
+
+def test_words_match_whole_words_only():
+    assert found("ethanol", "dissolved in methanol") == []
+    assert found("ethanol", "dissolved in ethanol.") == [(13, 20)]
+
+
+def test_numbers_do_not_match_inside_longer_numbers():
+    assert found("10", "heated for 100 min") == []
+    assert found("10", "added 10.5 g") == []
+    assert found("10", "added 10.0 g") == [(6, 8)]
+    assert found(surface_form(2.8), "added 2.80 g") == [(6, 9)]
+
+
+def test_overlapping_patterns_are_all_reported():
+    automaton = Automaton(["sodium", "sodium hydride", "hydride"])
+    matches = sorted((automaton.patterns[pid], start, end)
+                     for pid, start, end in automaton.finditer("sodium hydride"))
+    assert matches == [("hydride", 7, 14), ("sodium", 0, 6), ("sodium hydride", 0, 14)]
+
+
+def test_all_caps_names_are_grounded_but_enum_fields_are_skipped():
+    record = {"input_text": "The residue was dissolved in DMF.",
+              "inputs": {"m1": {"identifiers": [{"type": "NAME", "value": "DMF"}]}}}
+    assert [(row["Value"], row["Found"]) for row in ground_record(record)] == [("DMF", True)]
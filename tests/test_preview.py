@@ -0,0 +1,29 @@
+import random
+
+from preview import allocate, stratified_sample
+
+
+def test_allocation_sums_to_k():
+    assert sum(allocate(3, {"a": 5, "b": 5}).values()) == 3
+    sizes = {f"model_{i}": random.Random(i).randint(1, 50) for i in range(17)}
+    for k in (1, 5, 16, 17, 100, sum(sizes.values())):
+        counts = allocate(k, sizes)
+        assert sum(counts.values()) == k
+        assert all(counts[name] <= sizes[name] for name in sizes)
+
+
+def test_stratified_sample_respects_maximum_size():
+    entries = [{"model": "a", "prediction": f"a/{i}.json"} for i in range(4)] + \
+              [{"model": "b", "prediction": f"b/{i}.json"} for i in range(4)]
+    assert len(stratified_sample(entries, 3)) == 3
+    assert len(stratified_sample(entries)) == len(entries)
+
+
+def test_stratified_sample_order_is_a_seeded_permutation():
+    entries = [{"model": model, "prediction": f"{model}/{i}.json"} for model in "ab" for i in range(50)]
+    orders = [[e["prediction"] for e in stratified_sample(entries, seed=seed)] for seed in (0, 0, 1)]
+    assert sorted(orders[0]) == sorted(e["prediction"] for e in entries)
+    assert orders[0] == orders[1]
+    assert orders[0] != orders[2]
+    # Not the manifest order of either stratum
+    assert [p for p in orders[0] if p.startswith("a/")] != [f"a/{i}.json" for i in range(50)]
@@ -0,0 +1,25 @@
+import pandas as pd
+import pytest
+
+from regression import join_runs
+from scoring import LEAF_COLUMNS
+
+
+def leaf(source, reaction_id, path, status):
+    return (source, reaction_id, path, path.split(':')[-1], "a", "a" if status == "same" else "b",
+            None, None, status, 1.0 if status == "same" else 0.0)
+
+
+def test_records_without_reaction_id_join_per_source_file():
+    # Both files number their records "#0", so only the source file tells them apart
+    run = pd.DataFrame([leaf(f"gt{i}.json", "#0", f"field{j}", "same") for i in range(2) for j in range(20)],
+                       columns=LEAF_COLUMNS)
+    joined = join_runs(run, run)
+    assert len(joined) == len(run)
+    assert (joined["change"] == "still right").all()
+
+
+def test_duplicate_leaves_fail_instead_of_fanning_out():
+    run = pd.DataFrame([leaf("gt.json", "#0", "field", "same")] * 2, columns=LEAF_COLUMNS)
+    with pytest.raises(pd.errors.MergeError):
+        join_runs(run, run)
@@ -0,0 +1,23 @@
+import json
+
+import report
+from report import export_report
+
+
+def test_only_changed_pages_are_rendered_again(tmp_path, write_manifest, monkeypatch):
+    entries = write_manifest(tmp_path, n=3)
+    out = str(tmp_path / 'report')
+    assert export_report(entries, out) == (len(entries), len(entries))
+    assert export_report(entries, out) == (len(entries), 0)
+
+    # model_a and model_b share file names, but only the edited prediction's page is rendered
+    with open(entries[0]["prediction"]) as file:
+        records = json.load(file)
+    records[0]["notes"] = "edited"
+    with open(entries[0]["prediction"], 'w') as file:
+        json.dump(records, file)
+    assert export_report(entries, out) == (len(entries), 1)
+
+    # Changed scoring settings invalidate every page
+    monkeypatch.setattr(report, "comparison_settings", lambda: {"scoring_version": -1})
+    assert export_report(entries, out) == (len(entries), len(entries))
@@ -0,0 +1,49 @@
+import json
+
+from scoring import diff_table, finalize, merge_partials, score_manifest, score_shard
+
+
+def test_merged_shards_match_single_node(tmp_path, write_manifest):
+    entries = write_manifest(tmp_path)
+    single = finalize(score_manifest(entries, n_shards=1))
+    for n_shards in (2, 3, 5):
+        merged = finalize(merge_partials(score_shard(entries, n_shards, i) for i in range(n_shards)))
+        assert merged == single
+    # Shard order must not matter either
+    parts = [score_shard(entries, 3, i) for i in range(3)]
+    assert finalize(merge_partials(reversed(parts))) == single
+
+
+def test_same_reaction_for_different_models_gets_its_own_bootstrap_weights(tmp_path, write_manifest):
+    entries = write_manifest(tmp_path, n=1)
+    result = finalize(score_manifest(entries))
+    # r0 scores 100% for model_a but not for model_b: resampling them independently must give a spread
+    lo, hi = result["ci"]
+    assert hi > lo
+
+
+def test_partial_credit_only_for_configured_text_fields():
+    # The same pair of strings earns partial credit under "details" but not under "name"
+    gt = [{"details": "stirred at room temperature overnight", "name": "stirred at room temperature overnight"}]
+    llm = [{"details": "stirred overnight at room temperature for 16 h",
+            "name": "stirred overnight at room temperature for 16 h"}]
+    df = diff_table(gt, llm)
+    scores = dict(zip(df["Path"].astype(str).str.strip(), df["Score"]))
+    assert 0 < scores["[0]: details:"] < 1
+    assert scores["[0]: name:"] == 0
+
+
+def test_chunked_scoring_matches_one_batch(tmp_path, write_manifest):
+    entries = write_manifest(tmp_path, n=5)
+    for entry in entries[::3]:
+        with open(entry["prediction"]) as file:
+            records = json.load(file)
+        records[0]["output_reaction_conditions"]["stirring"]["details"] = "The mixture is stirred for 2 h"
+        with open(entry["prediction"], 'w') as file:
+            json.dump(records, file)
+    whole, whole_leaves = score_shard(entries, with_leaves=True, chunk_size=len(entries))
+    assert any(0 < row[-1] < 1 for row in whole_leaves)
+    for chunk_size in (1, 3):
+        partial, leaves = score_shard(entries, with_leaves=True, chunk_size=chunk_size)
+        assert finalize(partial) == finalize(whole)
+        assert list(map(repr, leaves)) == list(map(repr, whole_leaves))  # repr: NaN != NaN
@@ -0,0 +1,62 @@
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from scoring import finalize, load_manifest, score_manifest
+from service import ComparisonService, ResultCache
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class Interrupted(BaseException):
+    pass
+
+
+def test_interrupted_computation_is_not_cached_and_releases_waiters():
+    cache = ResultCache()
+    started, release = threading.Event(), threading.Event()
+    errors = []
+
+    def interrupted():
+        started.set()
+        release.wait()
+        raise Interrupted()
+
+    def waiter():
+        try:
+            cache.get("key", lambda: "not the leader")
+        except RuntimeError as error:
+            errors.append(error)
+
+    leader = threading.Thread(target=lambda: pytest.raises(Interrupted, cache.get, "key", interrupted))
+    leader.start()
+    started.wait()
+    thread = threading.Thread(target=waiter)
+    thread.start()
+    time.sleep(0.1)  # let the waiter block on the leader's flight
+    release.set()
+    leader.join()
+    thread.join()
+
+    assert len(errors) == 1
+    assert cache.stats()["entries"] == 0
+    assert cache.get("key", lambda: "value") == "value"
+
+
+def test_score_matches_scoring_a_manifest_entry(tmp_path):
+    gt = json.load(open(os.path.join(ROOT, 'example1.json')))[0]
+    llm = json.load(open(os.path.join(ROOT, 'example3.json')))[0]
+    truth, pred = [], []
+    for i in range(6):
+        truth.append(dict(gt, reaction_id=f'r{i}'))
+        pred.append(dict(llm if i % 2 else gt, reaction_id=f'r{i}'))
+    (tmp_path / 'gt.json').write_text(json.dumps(truth))
+    (tmp_path / 'pred.json').write_text(json.dumps(pred))
+    (tmp_path / 'manifest.json').write_text(json.dumps([{"ground_truth": "gt.json", "prediction": "pred.json"}]))
+
+    expected = finalize(score_manifest(load_manifest(str(tmp_path / 'manifest.json'))))
+    assert expected["ci"][0] < expected["ci"][1]
+    assert ComparisonService(str(tmp_path)).score('gt.json', 'pred.json') == expected